@@ -1,10 +1,11 @@
 import datetime
-import json
+import itertools
 import logging
 import os
 import random
 
 import numpy as np
+import orjson
 from faker import Faker
 
 # Set up logging
@@ -253,6 +254,44 @@ WOULD_CHOOSE_AGAIN = ["Definitely Yes", "Probably Yes", "Unsure", "Probably Not"
 DECISION_FACTORS = ["Academic Reputation", "Program Offerings", "Location", "Cost/Financial Aid", "Campus Culture",
                     "Career Opportunities", "Research Opportunities", "Facilities", "Family Influence"]
 
+# Free-text templates; one is picked at random and only that one is formatted
+THRIVING_STUDENT_TEMPLATES = [
+    "A student who is {trait} and enjoys {teaching_style}.",
+    "Someone who thrives in a {culture} environment and wants to pursue {program_name}.",
+    "{univ_name} works well for students who are self-motivated and interested in {teaching_interest}."
+]
+RETROSPECTIVE_FACTOR_TEMPLATES = [
+    "Looking back, I should have considered work-life balance more seriously.",
+    "I wish I had put more emphasis on internship opportunities.",
+    "The location and cost of living should have been more important factors in my decision.",
+    "I think I made the right choice focusing on {factor}.",
+    "I should have considered the teaching style more carefully before choosing."
+]
+STRENGTH_TEMPLATES = [
+    "Strong {program_name} program with excellent faculty.",
+    "Great {strength} and learning environment.",
+    "Amazing campus facilities and resources for students.",
+    "Strong industry connections leading to good job opportunities.",
+    "Excellent research opportunities and mentorship.",
+    "Diverse student body and inclusive campus culture."
+]
+WEAKNESS_TEMPLATES = [
+    "High cost of living and tuition fees.",
+    "Competitive environment can be stressful at times.",
+    "Some courses could benefit from more practical, hands-on components.",
+    "Administrative processes can be bureaucratic and time-consuming.",
+    "Limited parking and transportation options.",
+    "Work-life balance can be challenging with heavy course loads."
+]
+ADVICE_TEMPLATES = [
+    "Take advantage of networking opportunities with industry professionals.",
+    "Get involved in extracurricular activities to build a well-rounded profile.",
+    "Don''t hesitate to approach professors for guidance and mentorship.",
+    "Start internship hunting early to secure the best opportunities.",
+    "Balance your academic commitments with self-care and social activities.",
+    "Utilize all the resources available on campus - they''re there for you."
+]
+
 
 def get_univ_by_short_name(short_name):
     """Find university by short name"""
@@ -632,13 +671,14 @@ def generate_personal_fit(student_id, univ_profile, program_profile):
     program_name = program_profile.get("name", "this program")
 
     # Create description of thriving student based on university and program
-    student_descriptions = [
-        f"A student who is {typical_student_traits[0].lower()} and enjoys {program_profile.get('teaching_style', 'various teaching styles')}.",
-        f"Someone who thrives in a {univ_profile.get('campus_culture', ['diverse'])[0].lower()} environment and wants to pursue {program_name}.",
-        f"{univ_name} works well for students who are self-motivated and interested in {program_profile.get('teaching_style', 'learning')}."
-    ]
-
-    thriving_student_type = random.choice(student_descriptions)
+    thriving_student_type = random.choice(THRIVING_STUDENT_TEMPLATES).format(
+        trait=typical_student_traits[0].lower(),
+        teaching_style=program_profile.get('teaching_style', 'various teaching styles'),
+        culture=univ_profile.get('campus_culture', ['diverse'])[0].lower(),
+        program_name=program_name,
+        univ_name=univ_name,
+        teaching_interest=program_profile.get('teaching_style', 'learning')
+    )
 
     return {
         "id": student_id,
@@ -680,15 +720,9 @@ def generate_selection_criteria(student_id, univ_profile, program_profile):
     important_decision_factors = random.sample(potential_factors, min(len(potential_factors), num_factors))
 
     # Generate retrospective important factors
-    retrospective_factors = [
-        f"Looking back, I should have considered work-life balance more seriously.",
-        f"I wish I had put more emphasis on internship opportunities.",
-        f"The location and cost of living should have been more important factors in my decision.",
-        f"I think I made the right choice focusing on {important_decision_factors[0].lower()}.",
-        f"I should have considered the teaching style more carefully before choosing."
-    ]
-
-    retrospective_important_factors = random.choice(retrospective_factors)
+    retrospective_important_factors = random.choice(RETROSPECTIVE_FACTOR_TEMPLATES).format(
+        factor=important_decision_factors[0].lower()
+    )
 
     return {
         "id": student_id,
@@ -704,37 +738,16 @@ def generate_additional_insights(student_id, univ_profile, program_profile):
     timestamp = datetime.datetime.now().isoformat()
 
     # Generate university strengths based on university profile
-    strength_templates = [
-        f"Strong {program_profile.get('name')} program with excellent faculty.",
-        f"Great {univ_profile.get('strengths', ['education'])[0]} and learning environment.",
-        f"Amazing campus facilities and resources for students.",
-        f"Strong industry connections leading to good job opportunities.",
-        f"Excellent research opportunities and mentorship.",
-        f"Diverse student body and inclusive campus culture."
-    ]
-    university_strengths = random.choice(strength_templates)
+    university_strengths = random.choice(STRENGTH_TEMPLATES).format(
+        program_name=program_profile.get('name'),
+        strength=univ_profile.get('strengths', ['education'])[0]
+    )
 
     # Generate weaknesses
-    weakness_templates = [
-        f"High cost of living and tuition fees.",
-        f"Competitive environment can be stressful at times.",
-        f"Some courses could benefit from more practical, hands-on components.",
-        f"Administrative processes can be bureaucratic and time-consuming.",
-        f"Limited parking and transportation options.",
-        f"Work-life balance can be challenging with heavy course loads."
-    ]
-    university_weaknesses = random.choice(weakness_templates)
+    university_weaknesses = random.choice(WEAKNESS_TEMPLATES)
 
     # Generate advice
-    advice_templates = [
-        f"Take advantage of networking opportunities with industry professionals.",
-        f"Get involved in extracurricular activities to build a well-rounded profile.",
-        f"Don''t hesitate to approach professors for guidance and mentorship.",
-        f"Start internship hunting early to secure the best opportunities.",
-        f"Balance your academic commitments with self-care and social activities.",
-        f"Utilize all the resources available on campus - they''re there for you."
-    ]
-    prospective_student_advice = random.choice(advice_templates)
+    prospective_student_advice = random.choice(ADVICE_TEMPLATES)
 
     return {
         "id": student_id,
@@ -958,21 +971,19 @@ def generate_existing_students(total_students=None, num_students_per_program=Non
     return all_data
 
 
-def generate_sql_insert_statements(data):
-    """Generate SQL INSERT statements for all data tables"""
-    sql_statements = []
-
+def iter_sql_insert_statements(data):
+    """Yield SQL INSERT statements for all data tables one at a time"""
     # Universities
     for univ in data["universities"]:
         cols = ", ".join(univ.keys())
         vals = ", ".join([f"'{str(v)}'" if isinstance(v, str) else str(v) for v in univ.values()])
-        sql_statements.append(f"INSERT INTO universities ({cols}) VALUES ({vals});")
+        yield f"INSERT INTO universities ({cols}) VALUES ({vals});"
 
     # Programs
     for program in data["programs"]:
         cols = ", ".join(program.keys())
         vals = ", ".join([f"'{str(v)}'" if isinstance(v, str) else str(v) for v in program.values()])
-        sql_statements.append(f"INSERT INTO programs ({cols}) VALUES ({vals});")
+        yield f"INSERT INTO programs ({cols}) VALUES ({vals});"
 
     # Existing Students and all sections
     for table_name, records in data.items():
@@ -984,7 +995,7 @@ def generate_sql_insert_statements(data):
                     if isinstance(v, list):
                         processed_values.append(f"ARRAY{str(v)}")
                     elif isinstance(v, dict):
-                        processed_values.append(f"'{json.dumps(v)}'::jsonb")
+                        processed_values.append(f"'{orjson.dumps(v).decode()}'::jsonb")
                     elif v is None:
                         processed_values.append("NULL")
                     elif isinstance(v, str):
@@ -994,9 +1005,12 @@ def generate_sql_insert_statements(data):
 
                 cols = ", ".join(record.keys())
                 vals = ", ".join(processed_values)
-                sql_statements.append(f"INSERT INTO {table_name} ({cols}) VALUES ({vals});")
+                yield f"INSERT INTO {table_name} ({cols}) VALUES ({vals});"
+
 
-    return sql_statements
+def generate_sql_insert_statements(data):
+    """Generate SQL INSERT statements for all data tables"""
+    return list(iter_sql_insert_statements(data))
 
 
 def generate_data(total_students=None, num_students_per_program=None):
@@ -1038,8 +1052,8 @@ def save_to_json(data, filename="synthetic_data.json"):
 
     path = f'{os.getcwd()}/data/out/{filename}'
     os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w") as f:
-        json.dump(data, f, indent=2)
+    with open(path, "wb") as f:
+        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
     logger.info(f"Data saved to {path}")
 
 
@@ -1052,8 +1066,9 @@ def save_sql_statements(data, filename="insert_statements.sql", batch_size=1000)
         filename: Output SQL filename
         batch_size: Number of statements per batch for large datasets
     """
-    sql_statements = generate_sql_insert_statements(data)
-    total_statements = len(sql_statements)
+    # One statement per record; stream them instead of materialising the full list
+    sql_statements = iter_sql_insert_statements(data)
+    total_statements = sum(len(records) for records in data.values())
 
     path = f'{os.getcwd()}/data/out/{filename}'
     logger.info(f"Writing {total_statements} SQL statements to {path}")
@@ -1065,11 +1080,10 @@ def save_sql_statements(data, filename="insert_statements.sql", batch_size=1000)
 
             # Process statements in batches to prevent memory issues with large datasets
             for i in range(0, total_statements, batch_size):
-                batch = sql_statements[i:i + batch_size]
+                batch = itertools.islice(sql_statements, batch_size)
 
                 # Write this batch of statements
-                for stmt in batch:
-                    f.write(stmt + "\n")
+                f.writelines(stmt + "\n" for stmt in batch)
 
                 # Log progress
                 logger.info(
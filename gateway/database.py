@@ -1,3 +1,4 @@
+import logging
 import os
 from supabase import create_client
 from dotenv import load_dotenv
@@ -6,6 +7,8 @@ from utils import get_hashed_password
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Initialize Supabase client
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
@@ -51,11 +54,8 @@ def insert_user(username: str, email: str, name: str, password: str):
     # Insert the new user into the database
     response = supabase.table("users").insert(user_data).execute()
 
-    # Print the entire response to inspect its structure
-    print("Full Response:", response)
-    print("Response Data:", response.data)  # This should contain the inserted user data
-    print("Response Status Code (if available):", getattr(response, 'status_code', 'No status_code attribute'))
-    print("Response Count:", getattr(response, 'count', 'No count attribute'))  # Check if count exists
+    # Log the response structure at debug level (silenced by default)
+    logger.debug(f"Insert user response data: {response.data}")
 
     # Check if there is an error in the response
     if hasattr(response, 'error') and response.error:
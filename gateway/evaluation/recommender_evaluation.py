@@ -2,11 +2,14 @@ import concurrent.futures
 import logging
 import os
 import tempfile
+from functools import lru_cache
+from itertools import chain
 from typing import List, Dict
 from typing import Tuple
 
 import numpy as np
 import pandas as pd
+import scipy.sparse as sp
 from sklearn.model_selection import train_test_split
 from tqdm import tqdm
 
@@ -16,6 +19,16 @@ from university_recommender import UniversityRecommender
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Largest cutoff k with precomputed NDCG rank discounts (1 / log2(rank + 1))
+NDCG_MAX_K = 100
+_NDCG_DISCOUNTS = 1.0 / np.log2(np.arange(2, NDCG_MAX_K + 2))
+
+
+@lru_cache(maxsize=None)
+def _description_tokens(description: str) -> frozenset:
+    """Tokenize a university description once; the same descriptions recur across users"""
+    return frozenset(description.split())
+
 
 class RecommenderEvaluator:
     """Evaluation framework for the University Recommender System"""
@@ -28,8 +41,15 @@ class RecommenderEvaluator:
             data_path: Path to the synthetic dataset
         """
         self.data = pd.read_csv(data_path)
+        # University labels repeat across many profiles, so store them as a category
+        # and downcast integer columns. Float columns keep float64 so test users see
+        # the same values the recommender reads back from the training CSV
+        self.data['university'] = self.data['university'].astype('category')
+        for column in self.data.select_dtypes(include='integer').columns:
+            self.data[column] = pd.to_numeric(self.data[column], downcast='integer')
         self.logger = logging.getLogger(__name__)
         self.recommender = None
+        self.train_universities = set()
 
     def prepare_train_test_split(self, test_size=0.2, random_state=42) -> Tuple[pd.DataFrame, pd.DataFrame]:
         """
@@ -51,6 +71,9 @@ class RecommenderEvaluator:
         # Clean up temporary file
         os.unlink(tmp_file.name)
 
+        # Cache the training universities' names for coverage computations
+        self.train_universities = {uni['name'] for uni in self.recommender.universities}
+
         return train_data, test_data
 
     def evaluate_batch(self, batch_data: pd.DataFrame, methods: Dict, k: int) -> List[Dict]:
@@ -59,10 +82,11 @@ class RecommenderEvaluator:
         """
         batch_results = []
 
-        for idx, user in batch_data.iterrows():
-            # Convert row to dictionary, excluding the actual university
-            user_dict = user.drop('university').to_dict()
-            actual_university = user['university']
+        # Convert rows to plain dictionaries in one pass, excluding the actual university,
+        # instead of materialising a Series per row with iterrows()
+        user_records = batch_data.drop(columns='university').to_dict('records')
+
+        for idx, actual_university, user_dict in zip(batch_data.index, batch_data['university'], user_records):
 
             # Store results for this user
             user_results = {
@@ -73,26 +97,31 @@ class RecommenderEvaluator:
 
             # Try each recommendation method
             for method_name, recommender_method in methods.items():
+                # Only the recommender call is guarded; empty or malformed results are
+                # rejected below so the metric code cannot raise and abort the whole batch
                 try:
                     recommendations = recommender_method(user_dict, k)
-                    predicted_universities = [rec['name'] for rec in recommendations]
-
-                    # Calculate metrics
-                    relevance = [1 if uni == actual_university else 0 for uni in predicted_universities]
-                    precision = 1 if actual_university in predicted_universities else 0
-
-                    user_results['method_results'][method_name] = {
-                        'recommendations': recommendations,
-                        'predicted_unis': predicted_universities,
-                        'relevance': relevance,
-                        'precision': precision,
-                        'ndcg': self._calculate_ndcg(relevance) if sum(relevance) > 0 else 0,
-                        'diversity': self._calculate_diversity(recommendations)
-                    }
-
                 except Exception as e:
                     self.logger.warning(f"Error with {method_name} recommendations for user {idx}: {str(e)}")
                     user_results['method_results'][method_name] = None
+                    continue
+
+                if not recommendations:
+                    self.logger.warning(f"No {method_name} recommendations for user {idx}")
+                    user_results['method_results'][method_name] = None
+                    continue
+
+                if not all(self._is_valid_recommendation(rec) for rec in recommendations):
+                    self.logger.warning(f"Malformed {method_name} recommendations for user {idx}")
+                    user_results['method_results'][method_name] = None
+                    continue
+
+                # Ranking metrics are computed for all users at once after the batches complete
+                user_results['method_results'][method_name] = {
+                    'recommendations': recommendations,
+                    'predicted_unis': [rec['name'] for rec in recommendations],
+                    'diversity': self._calculate_diversity(recommendations)
+                }
 
             batch_results.append(user_results)
 
@@ -106,22 +135,6 @@ class RecommenderEvaluator:
         if self.recommender is None:
             raise ValueError("Recommender not initialized. Run prepare_train_test_split first.")
 
-        # Initialize metrics
-        metrics = {
-            'profile_based': {
-                'ndcg': [], 'precision': [], 'recall': [],
-                'diversity': [], 'coverage': set(), 'personalization': []
-            },
-            'embedding': {
-                'ndcg': [], 'precision': [], 'recall': [],
-                'diversity': [], 'coverage': set(), 'personalization': []
-            },
-            'hybrid': {
-                'ndcg': [], 'precision': [], 'recall': [],
-                'diversity': [], 'coverage': set(), 'personalization': []
-            }
-        }
-
         # Precompute embeddings for test data
         logger.info("Precomputing embeddings for test data...")
         self.recommender.embedding_manager.precompute_embeddings(test_data, self.recommender.universities)
@@ -160,87 +173,117 @@ class RecommenderEvaluator:
                     except Exception as e:
                         self.logger.error(f"Error processing batch {batch_idx}: {str(e)}")
 
-        # Aggregate results
-        for result in all_results:
-            for method_name in methods:
-                method_result = result['method_results'].get(method_name)
-                if method_result:
-                    method_metrics = metrics[method_name]
-                    method_metrics['ndcg'].append(method_result['ndcg'])
-                    method_metrics['precision'].append(method_result['precision'])
-                    method_metrics['recall'].append(method_result['precision'])
-                    method_metrics['diversity'].append(method_result['diversity'])
-                    method_metrics['coverage'].update(method_result['predicted_unis'])
-
         # Calculate final metrics
-        train_universities = set(uni['name'] for uni in self.recommender.universities)
         evaluation_results = {}
 
         for method_name in methods:
-            method_metrics = metrics[method_name]
-
-            # Calculate personalization
-            method_recommendations = [
-                r['method_results'][method_name]['predicted_unis']
+            # Collect successful results for this method
+            scored = [
+                (r['actual_university'], r['method_results'][method_name])
                 for r in all_results
                 if r['method_results'].get(method_name)
             ]
-            method_metrics['personalization'] = self._calculate_personalization(method_recommendations)
+            method_recommendations = [method_result['predicted_unis'] for _, method_result in scored]
+
+            # Boolean (users x k) matrix marking where the actual university was recommended
+            hits = np.zeros((len(scored), k), dtype=bool)
+            for row, (actual_university, method_result) in enumerate(scored):
+                predicted = method_result['predicted_unis'][:k]
+                hits[row, :len(predicted)] = np.asarray(predicted, dtype=object) == actual_university
+
+            # Precision/recall (one relevant item per user) and NDCG for every user in one pass
+            precision = hits.any(axis=1).astype(np.float64)
+            ndcg = self._calculate_ndcg(hits)
+            diversity = np.fromiter((method_result['diversity'] for _, method_result in scored),
+                                    dtype=np.float64, count=len(scored))
+
+            # Calculate personalization
+            personalization = self._calculate_personalization(method_recommendations)
 
             # Calculate coverage percentage
-            coverage_percentage = len(method_metrics['coverage']) / len(train_universities) * 100
+            coverage = set(chain.from_iterable(method_recommendations))
+            coverage_percentage = len(coverage) / len(self.train_universities) * 100
 
             # Aggregate metrics
             evaluation_results[method_name] = {
-                'ndcg@k': np.mean(method_metrics['ndcg']) if method_metrics['ndcg'] else 0,
-                'precision@k': np.mean(method_metrics['precision']) if method_metrics['precision'] else 0,
-                'recall@k': np.mean(method_metrics['recall']) if method_metrics['recall'] else 0,
-                'diversity': np.mean(method_metrics['diversity']) if method_metrics['diversity'] else 0,
+                'ndcg@k': ndcg.mean() if len(scored) else 0,
+                'precision@k': precision.mean() if len(scored) else 0,
+                'recall@k': precision.mean() if len(scored) else 0,
+                'diversity': diversity.mean() if len(scored) else 0,
                 'coverage_percentage': coverage_percentage,
-                'personalization': method_metrics['personalization']
+                'personalization': personalization
             }
 
         return evaluation_results
 
-    def _calculate_ndcg(self, relevance: List[int], k: int = None) -> float:
-        """Calculate Normalized Discounted Cumulative Gain"""
-        if k is None:
-            k = len(relevance)
-        dcg = sum((2 ** rel - 1) / np.log2(i + 2) for i, rel in enumerate(relevance[:k]))
-        idcg = sum((2 ** rel - 1) / np.log2(i + 2) for i, rel in enumerate(sorted(relevance, reverse=True)[:k]))
-        return dcg / idcg if idcg > 0 else 0
+    def _calculate_ndcg(self, hits: np.ndarray) -> np.ndarray:
+        """
+        Calculate Normalized Discounted Cumulative Gain for every user at once
+
+        Args:
+            hits: Boolean (users x k) matrix of binary relevance per rank position
+
+        Returns:
+            Array of per-user NDCG scores (0 for users with no relevant recommendation)
+        """
+        # Binary gains (2**rel - 1 == rel) weighted by log2 rank discounts
+        k = hits.shape[1]
+        weights = _NDCG_DISCOUNTS[:k] if k <= NDCG_MAX_K else 1.0 / np.log2(np.arange(2, k + 2))
+        dcg = hits @ weights
+        # The ideal ranking puts every hit first, so ideal DCG is the sum of the first
+        # (number of hits) discounts -- a cumulative-sum lookup instead of a sort
+        ideal_dcg_by_hits = np.concatenate(([0.0], np.cumsum(weights)))
+        idcg = ideal_dcg_by_hits[hits.sum(axis=1)]
+        return np.divide(dcg, idcg, out=np.zeros_like(dcg), where=idcg > 0)
+
+    @staticmethod
+    def _is_valid_recommendation(rec) -> bool:
+        """
+        Check that a recommendation has the fields the metric code relies on
+
+        Args:
+            rec: A single recommendation returned by a recommender method
+
+        Returns:
+            True if it has a name and any description is a string
+        """
+        return isinstance(rec, dict) and 'name' in rec and isinstance(rec.get('description', ''), str)
 
     def _calculate_diversity(self, recommendations: List[Dict]) -> float:
         """
         Calculate diversity score based on recommendation attributes
         """
-        unique_attributes = set()
-        for rec in recommendations:
-            # Extract key attributes that contribute to diversity
-            if 'description' in rec:
-                unique_attributes.update(rec['description'].split())
+        # Extract key attributes that contribute to diversity from cached description tokens
+        unique_attributes = frozenset().union(
+            *(_description_tokens(rec['description']) for rec in recommendations if 'description' in rec))
         return len(unique_attributes) / (len(recommendations) * 10)  # Normalize
 
     def _calculate_personalization(self, all_recommendations: List[List[str]]) -> float:
         """
         Calculate personalization by comparing recommendations across users
         """
-        if len(all_recommendations) < 2:
+        n_users = len(all_recommendations)
+        if n_users < 2:
             return 0.0
 
-        similarity_sum = 0
-        comparison_count = 0
-
-        for i in range(len(all_recommendations)):
-            for j in range(i + 1, len(all_recommendations)):
-                set_i = set(all_recommendations[i])
-                set_j = set(all_recommendations[j])
-                jaccard_sim = len(set_i.intersection(set_j)) / len(set_i.union(set_j))
-                similarity_sum += jaccard_sim
-                comparison_count += 1
+        # Binary (users x universities) sparse matrix of each user's distinct recommendations
+        uni_to_col = {}
+        indices, indptr = [], [0]
+        for recommendations in all_recommendations:
+            indices.extend(uni_to_col.setdefault(uni, len(uni_to_col)) for uni in set(recommendations))
+            indptr.append(len(indices))
+        x = sp.csr_matrix((np.ones(len(indices)), indices, indptr), shape=(n_users, len(uni_to_col)))
+
+        # Pairwise intersection sizes in one sparse product; only overlapping pairs (i < j)
+        # contribute, since Jaccard similarity is zero when nothing is shared
+        sizes = np.diff(x.indptr)
+        overlaps = sp.triu(x @ x.T, k=1).tocoo()
+        unions = sizes[overlaps.row] + sizes[overlaps.col] - overlaps.data
+        similarity_sum = (overlaps.data / unions).sum()
+        comparison_count = n_users * (n_users - 1) // 2
 
         # Return dissimilarity (1 - similarity) as personalization score
-        return 1 - (similarity_sum / comparison_count) if comparison_count > 0 else 0
+        return 1 - (similarity_sum / comparison_count)
 
 
 # Example usage:
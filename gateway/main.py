@@ -1,19 +1,18 @@
-import json
 import logging
 import time
 from datetime import timedelta
 from typing import Dict
 
+import orjson
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordRequestForm
 
-from auth import authenticate, create_token, get_current_active_user
+from auth import authenticate, create_token, get_current_active_user, supabase_client
 from config import ALLOWED_ORIGINS, JAMAIBASE_PROJECT_ID, JAMAIBASE_PAT, ENVIRONMENT
 from models import Token, User, RecommendationRequest
 from services.llm_justification import JustificationGenerator
 from services.recommendation_service import UniversityRecommendationService
-from services.supabase_client import SupabaseDB
 from services.utils.heartbeat_service import heartbeat_service
 from utils import get_hashed_password
 
@@ -25,6 +24,9 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# Profile fields stored as JSON-encoded lists
+JSON_LIST_PROFILE_FIELDS = ("career_goals", "passionate_activities")
+
 app = FastAPI()
 
 # Allow frontend requests from localhost:3000
@@ -36,9 +38,7 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize the Supabase client with the necessary parameters
-supabase_client = SupabaseDB.from_env()
-
+# Reuse the Supabase client created by auth so both share one connection pool
 recommendation_service = UniversityRecommendationService(supabase_client)
 logger.info("UniversityRecommendationService initialized.")
 
@@ -89,7 +89,7 @@ async def heartbeat_endpoint():
 # Login route
 @app.post("/token", response_model=Token)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
-    print(form_data)
+    logger.debug(f"Login attempt for user {form_data.username}")
     user = await authenticate(form_data.username, form_data.password)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
@@ -145,19 +145,13 @@ async def get_user_profile(
 
         # Transform specific fields
         if profile_data:
-            # Handle career_goals
-            if "career_goals" in profile_data and isinstance(profile_data["career_goals"], str):
-                try:
-                    profile_data["career_goals"] = json.loads(profile_data["career_goals"])
-                except:
-                    pass  # Keep as is if parsing fails
-
-            # Handle passionate_activities
-            if "passionate_activities" in profile_data and isinstance(profile_data["passionate_activities"], str):
-                try:
-                    profile_data["passionate_activities"] = json.loads(profile_data["passionate_activities"])
-                except:
-                    pass  # Keep as is if parsing fails
+            # Decode JSON-encoded list fields
+            for field in JSON_LIST_PROFILE_FIELDS:
+                if isinstance(profile_data.get(field), str):
+                    try:
+                        profile_data[field] = orjson.loads(profile_data[field])
+                    except orjson.JSONDecodeError:
+                        pass  # Keep as is if parsing fails
 
         return {
             "profile": profile_data
@@ -1,4 +1,8 @@
+import heapq
 import logging
+import random
+from collections import defaultdict
+from operator import itemgetter
 
 import hnswlib
 import numpy as np
@@ -6,6 +10,40 @@ from sentence_transformers import SentenceTransformer
 
 logger = logging.getLogger(__name__)
 
+# One-hot vocabularies and ordinal mappings shared by both profile vector builders
+LEARNING_STYLES = (
+    'Lecture-based', 'Hands-on/Practical', 'Project-based',
+    'Research-oriented', 'Seminar-based', 'Online/Remote'
+)
+EXTRACURRICULAR_ACTIVITIES = (
+    'Sports', 'Arts & Culture', 'Academic Clubs',
+    'Community Service', 'Professional/Career Clubs'
+)
+PERSONALITY_TRAITS = (
+    'Ambitious', 'Creative', 'Analytical', 'Collaborative',
+    'Competitive', 'Introverted', 'Extroverted', 'Independent'
+)
+# Per-student similarity keys and the university score keys they are averaged into
+SIMILARITY_SCORE_KEYS = (
+    ('overall_similarity', 'overall_score'),
+    ('academic_similarity', 'academic_score'),
+    ('social_similarity', 'social_score'),
+    ('financial_similarity', 'financial_score'),
+    ('career_similarity', 'career_score'),
+    ('geographic_similarity', 'geographic_score'),
+    ('facilities_similarity', 'facilities_score'),
+    ('reputation_similarity', 'reputation_score'),
+    ('personal_fit_similarity', 'personal_fit_score')
+)
+WEEKLY_HOURS_MAPPING = {
+    '0 (None)': 0.0,
+    '1–5 hours': 0.2,
+    '6–10 hours': 0.4,
+    '11–15 hours': 0.6,
+    '16–20 hours': 0.8,
+    '20+ hours': 1.0
+}
+
 
 class UniversityRecommender:
     """
@@ -40,12 +78,17 @@ class UniversityRecommender:
         self.existing_students = []
         self.programs = []
 
-        # HNSW indexes
+        # Similarity indexes
         self.text_indexes = {}
-        self.student_profile_index = None
-        self.student_vectors = []
+        # L2-normalized student profile vectors, one row per entry in student_ids
+        self.student_profile_matrix = None
         self.student_ids = []
 
+        # Lookups by id and existing students grouped by university_id
+        self._universities_by_id = {}
+        self._students_by_id = {}
+        self._students_by_university = {}
+
     def _init_text_model(self):
         """Initialize text embedding model only when needed"""
         if self.text_model is None:
@@ -65,9 +108,19 @@ class UniversityRecommender:
         self.existing_students = existing_students
         self.programs = programs
 
+        # Index universities and students by id once instead of scanning per lookup
+        self._universities_by_id = {u.get('id'): u for u in universities}
+        self._students_by_id = {s.get('id'): s for s in existing_students}
+
+        # Group students by university once instead of scanning per candidate
+        students_by_university = defaultdict(list)
+        for student in existing_students:
+            students_by_university[student.get('university_id')].append(student)
+        self._students_by_university = dict(students_by_university)
+
         # Only build student profile index (more essential)
         # Skip text indexes to save memory
-        self._build_student_profile_index()
+        self._build_student_profile_matrix()
 
     def _build_text_indexes(self, fields=None):
         """
@@ -106,10 +159,10 @@ class UniversityRecommender:
                 'student_ids': [s.get('id') for s in self.existing_students if s.get(field)]
             }
 
-    def _build_student_profile_index(self):
+    def _build_student_profile_matrix(self):
         """
-        Build an HNSW index for efficient similarity search across student profiles.
-        Memory-optimized version with reduced parameters.
+        Build a normalized vector matrix for exact cosine similarity search across student profiles.
+        With at most a few hundred profiles a single matrix-vector product beats an HNSW graph.
         """
         logger.info("Building student profile vector index...")
 
@@ -119,37 +172,37 @@ class UniversityRecommender:
             return
 
         # Create vector representations for all student profiles
-        self.student_vectors = []
+        self.student_profile_matrix = None
         self.student_ids = []
 
         # Set a maximum number of vectors to include to limit memory usage
         max_vectors = min(len(self.existing_students), 300)
 
+        # Write vectors straight into a preallocated float32 matrix, sized from the first vector
+        vectors_array = None
+        count = 0
         for student in self.existing_students[:max_vectors]:
             # Create a vector representation of the student profile
             vector = self._create_student_vector(student)
             if vector is not None:
-                self.student_vectors.append(vector)
+                if vectors_array is None:
+                    vectors_array = np.empty((max_vectors, len(vector)), dtype=np.float32)
+                vectors_array[count] = vector
+                count += 1
                 self.student_ids.append(student.get('id'))
 
-        # Convert to numpy array
-        if not self.student_vectors:
+        if count == 0:
             logger.warning("No valid student vectors created")
             return
 
-        vectors_array = np.array(self.student_vectors)
+        vectors_array = vectors_array[:count]
 
-        # Create HNSW index with memory-optimized parameters
-        if len(vectors_array) > 0:
-            dim = vectors_array.shape[1]
-            self.student_profile_index = hnswlib.Index(space='cosine', dim=dim)
-            # Reduced parameters: M=8 (vs 16), ef_construction=100 (vs 200)
-            self.student_profile_index.init_index(max_elements=len(vectors_array), ef_construction=100, M=8)
-            self.student_profile_index.add_items(vectors_array, np.arange(len(vectors_array)))
-            # Lower ef value for faster search with small accuracy trade-off
-            self.student_profile_index.set_ef(50)
+        # L2-normalize rows in place once so cosine similarity is a plain dot product at query time
+        vectors_array /= np.maximum(np.linalg.norm(vectors_array, axis=1, keepdims=True), 1e-12)
+        self.student_profile_matrix = vectors_array
 
-            logger.info(f"Built student profile index with {len(self.student_vectors)} vectors of dimension {dim}")
+        dim = vectors_array.shape[1]
+        logger.info(f"Built student profile matrix with {len(self.student_ids)} vectors of dimension {dim}")
 
     def _create_student_vector(self, student):
         """
@@ -167,12 +220,8 @@ class UniversityRecommender:
         # Academic features
         if 'learning_styles' in student:
             # One-hot encoding for learning styles
-            learning_styles = [
-                'Lecture-based', 'Hands-on/Practical', 'Project-based',
-                'Research-oriented', 'Seminar-based', 'Online/Remote'
-            ]
-            for style in learning_styles:
-                features.append(1.0 if style in student.get('learning_styles', []) else 0.0)
+            selected = set(student.get('learning_styles', []))
+            features.extend(1.0 if style in selected else 0.0 for style in LEARNING_STYLES)
         else:
             # Pad with zeros if not available
             features.extend([0.0] * 6)
@@ -186,26 +235,14 @@ class UniversityRecommender:
         # Social features
         if 'extracurricular_activities' in student:
             # One-hot encoding for activities
-            activities = [
-                'Sports', 'Arts & Culture', 'Academic Clubs',
-                'Community Service', 'Professional/Career Clubs'
-            ]
-            for activity in activities:
-                features.append(1.0 if activity in student.get('extracurricular_activities', []) else 0.0)
+            selected = set(student.get('extracurricular_activities', []))
+            features.extend(1.0 if activity in selected else 0.0 for activity in EXTRACURRICULAR_ACTIVITIES)
         else:
             # Pad with zeros if not available
             features.extend([0.0] * 5)
 
         # Weekly hours mapping
-        hours_mapping = {
-            '0 (None)': 0.0,
-            '1–5 hours': 0.2,
-            '6–10 hours': 0.4,
-            '11–15 hours': 0.6,
-            '16–20 hours': 0.8,
-            '20+ hours': 1.0
-        }
-        features.append(hours_mapping.get(student.get('weekly_extracurricular_hours', '0 (None)'), 0.0))
+        features.append(WEEKLY_HOURS_MAPPING.get(student.get('weekly_extracurricular_hours', '0 (None)'), 0.0))
 
         # Career features
         features.append(student.get('job_placement_support', 5) / 10.0)
@@ -228,18 +265,14 @@ class UniversityRecommender:
         # Personality traits
         if 'typical_student_traits' in student:
             # One-hot encoding for personality traits
-            traits = [
-                'Ambitious', 'Creative', 'Analytical', 'Collaborative',
-                'Competitive', 'Introverted', 'Extroverted', 'Independent'
-            ]
-            for trait in traits:
-                features.append(1.0 if trait in student.get('typical_student_traits', []) else 0.0)
+            selected = set(student.get('typical_student_traits', []))
+            features.extend(1.0 if trait in selected else 0.0 for trait in PERSONALITY_TRAITS)
         else:
             # Pad with zeros if not available
             features.extend([0.0] * 8)
 
-        # Convert to numpy array
-        return np.array(features)
+        # Convert to float32 numpy array (matches the student profile index)
+        return np.array(features, dtype=np.float32)
 
     def _create_aspiring_student_vector(self, aspiring_profile):
         """
@@ -258,12 +291,8 @@ class UniversityRecommender:
         # Academic features
         if 'learning_style' in aspiring_profile:
             # One-hot encoding for learning style
-            learning_styles = [
-                'Lecture-based', 'Hands-on/Practical', 'Project-based',
-                'Research-oriented', 'Seminar-based', 'Online/Remote'
-            ]
-            for style in learning_styles:
-                features.append(1.0 if style == aspiring_profile.get('learning_style', '') else 0.0)
+            selected_style = aspiring_profile.get('learning_style', '')
+            features.extend(1.0 if style == selected_style else 0.0 for style in LEARNING_STYLES)
         else:
             # Pad with zeros if not available
             features.extend([0.0] * 6)
@@ -277,26 +306,14 @@ class UniversityRecommender:
         # Social features
         if 'interested_activities' in aspiring_profile:
             # One-hot encoding for activities
-            activities = [
-                'Sports', 'Arts & Culture', 'Academic Clubs',
-                'Community Service', 'Professional/Career Clubs'
-            ]
-            for activity in activities:
-                features.append(1.0 if activity in aspiring_profile.get('interested_activities', []) else 0.0)
+            selected = set(aspiring_profile.get('interested_activities', []))
+            features.extend(1.0 if activity in selected else 0.0 for activity in EXTRACURRICULAR_ACTIVITIES)
         else:
             # Pad with zeros if not available
             features.extend([0.0] * 5)
 
         # Weekly hours mapping
-        hours_mapping = {
-            '0 (None)': 0.0,
-            '1–5 hours': 0.2,
-            '6–10 hours': 0.4,
-            '11–15 hours': 0.6,
-            '16–20 hours': 0.8,
-            '20+ hours': 1.0
-        }
-        features.append(hours_mapping.get(aspiring_profile.get('weekly_extracurricular_hours', '0 (None)'), 0.0))
+        features.append(WEEKLY_HOURS_MAPPING.get(aspiring_profile.get('weekly_extracurricular_hours', '0 (None)'), 0.0))
 
         # Career features (default to importance values or mid-range)
         features.append(aspiring_profile.get('internship_importance', 5) / 10.0)
@@ -319,18 +336,14 @@ class UniversityRecommender:
         # Personality traits
         if 'personality_traits' in aspiring_profile:
             # One-hot encoding for personality traits
-            traits = [
-                'Ambitious', 'Creative', 'Analytical', 'Collaborative',
-                'Competitive', 'Introverted', 'Extroverted', 'Independent'
-            ]
-            for trait in traits:
-                features.append(1.0 if trait in aspiring_profile.get('personality_traits', []) else 0.0)
+            selected = set(aspiring_profile.get('personality_traits', []))
+            features.extend(1.0 if trait in selected else 0.0 for trait in PERSONALITY_TRAITS)
         else:
             # Pad with zeros if not available
             features.extend([0.0] * 8)
 
-        # Convert to numpy array
-        return np.array(features)
+        # Convert to float32 numpy array (matches the student profile index)
+        return np.array(features, dtype=np.float32)
 
     def find_similar_students_vector(self, aspiring_profile, top_k=100):
         """
@@ -344,28 +357,33 @@ class UniversityRecommender:
         Returns:
             List of (student_id, similarity_score) tuples
         """
-        if self.student_profile_index is None or len(self.student_vectors) == 0:
+        if self.student_profile_matrix is None or len(self.student_ids) == 0:
             logger.warning("Student profile index not available for similarity search")
             return []
 
         # Create vector for aspiring student
         aspiring_vector = self._create_aspiring_student_vector(aspiring_profile)
 
+        # Cosine similarity against every student with a single matrix-vector product
+        aspiring_vector /= max(np.linalg.norm(aspiring_vector), 1e-12)
+        cosine = self.student_profile_matrix @ aspiring_vector
+
         # Find nearest neighbors - limit k to available vectors
-        k = min(top_k, len(self.student_vectors), 50)  # Further limit to max 50 neighbors
-        labels, distances = self.student_profile_index.knn_query(aspiring_vector.reshape(1, -1), k=k)
+        k = min(top_k, len(self.student_ids), 50)  # Further limit to max 50 neighbors
 
-        # Convert to student IDs and similarity scores
-        similar_students = []
-        for i in range(len(labels[0])):
-            student_idx = labels[0][i]
-            distance = distances[0][i]
-            student_id = self.student_ids[student_idx]
-            # Convert distance to similarity (1 - normalized distance)
-            similarity = 1.0 - min(1.0, distance)
-            similar_students.append((student_id, similarity))
+        # Select the top k in linear time, then sort only those k
+        if k < len(cosine):
+            labels = np.argpartition(-cosine, k - 1)[:k]
+        else:
+            labels = np.arange(len(cosine))
+        labels = labels[np.argsort(-cosine[labels], kind='stable')]
 
-        return similar_students
+        # Convert to similarity (1 - cosine distance, floored at zero)
+        similarities = np.maximum(cosine[labels], 0.0)
+
+        # Convert to student IDs and similarity scores
+        return [(self.student_ids[student_idx], similarity)
+                for student_idx, similarity in zip(labels.tolist(), similarities.tolist())]
 
     def compute_academic_similarity(self, aspiring_profile, existing_profile):
         """Calculate academic similarity based on field of study, learning style, etc."""
@@ -666,7 +684,7 @@ class UniversityRecommender:
     def compute_student_similarity(self, aspiring_profile, existing_student):
         """Compute overall similarity between aspiring student and existing student"""
         # Find university data for this student
-        university = next((u for u in self.universities if u.get('id') == existing_student.get('university_id')), {})
+        university = self._universities_by_id.get(existing_student.get('university_id'), {})
 
         # Compute category similarities
         academic_sim = self.compute_academic_similarity(aspiring_profile, existing_student)
@@ -705,6 +723,21 @@ class UniversityRecommender:
             'personal_fit_similarity': personal_sim
         }
 
+    @staticmethod
+    def _average_similarity_scores(students):
+        """
+        Average every category similarity across students in a single pass over the students.
+
+        Args:
+            students: Non-empty list of similarity data dicts from compute_student_similarity
+
+        Returns:
+            Dictionary mapping each university score key to its average
+        """
+        rows = [[student[similarity_key] for similarity_key, _ in SIMILARITY_SCORE_KEYS] for student in students]
+        return {score_key: sum(column) / len(students)
+                for (_, score_key), column in zip(SIMILARITY_SCORE_KEYS, zip(*rows))}
+
     def recommend_universities_vector_based(self, aspiring_profile, top_n=10):
         """
         Generate university recommendations using vector similarity search.
@@ -735,7 +768,7 @@ class UniversityRecommender:
         student_id_to_similarity = dict(similar_student_ids_scores)
 
         for student_id, _ in similar_student_ids_scores:
-            student = next((s for s in self.existing_students if s.get('id') == student_id), None)
+            student = self._students_by_id.get(student_id)
             if student:
                 # Add vector similarity score
                 student['vector_similarity'] = student_id_to_similarity[student_id]
@@ -760,7 +793,7 @@ class UniversityRecommender:
 
             # Update university trackers
             if university_id not in university_scores:
-                university = next((u for u in self.universities if u.get('id') == university_id), None)
+                university = self._universities_by_id.get(university_id)
                 if not university:
                     continue
 
@@ -792,34 +825,14 @@ class UniversityRecommender:
 
         # 4. CALCULATE FINAL SCORES: Compute average scores and top similar students
         for university_id, students in university_students.items():
-            # Sort students by overall similarity
-            students.sort(key=lambda x: x['overall_similarity'], reverse=True)
-
-            # Take top students per university (limited to 3 instead of 5 to save memory)
-            top_students = students[:3]
+            # Take top students per university by overall similarity (limited to 3 instead of 5 to save memory)
+            top_students = heapq.nlargest(3, students, key=itemgetter('overall_similarity'))
 
             if not top_students:
                 continue
 
             # Calculate average scores from detailed similarities
-            university_scores[university_id]['overall_score'] = sum(
-                s['overall_similarity'] for s in top_students) / len(top_students)
-            university_scores[university_id]['academic_score'] = sum(
-                s['academic_similarity'] for s in top_students) / len(top_students)
-            university_scores[university_id]['social_score'] = sum(s['social_similarity'] for s in top_students) / len(
-                top_students)
-            university_scores[university_id]['financial_score'] = sum(
-                s['financial_similarity'] for s in top_students) / len(top_students)
-            university_scores[university_id]['career_score'] = sum(s['career_similarity'] for s in top_students) / len(
-                top_students)
-            university_scores[university_id]['geographic_score'] = sum(
-                s['geographic_similarity'] for s in top_students) / len(top_students)
-            university_scores[university_id]['facilities_score'] = sum(
-                s['facilities_similarity'] for s in top_students) / len(top_students)
-            university_scores[university_id]['reputation_score'] = sum(
-                s['reputation_similarity'] for s in top_students) / len(top_students)
-            university_scores[university_id]['personal_fit_score'] = sum(
-                s['personal_fit_similarity'] for s in top_students) / len(top_students)
+            university_scores[university_id].update(self._average_similarity_scores(top_students))
 
             # Set similar students (limited to top 3 for output)
             university_scores[university_id]['similar_students'] = top_students[:3]
@@ -828,14 +841,10 @@ class UniversityRecommender:
             university_scores[university_id]['matching_student_count'] = university_scores[university_id][
                 'student_count']
 
-        # Convert to list and sort by overall score
-        final_scores = list(university_scores.values())
-        final_scores.sort(key=lambda x: x['overall_score'], reverse=True)
-
-        logger.info(f"Generated {len(final_scores)} university recommendations based on vector similarity")
+        logger.info(f"Generated {len(university_scores)} university recommendations based on vector similarity")
 
-        # Return top_n recommendations
-        return final_scores[:top_n]
+        # Return top_n recommendations by overall score
+        return heapq.nlargest(top_n, university_scores.values(), key=itemgetter('overall_score'))
 
     def recommend_universities(self, aspiring_profile, top_n=10):
         """
@@ -850,7 +859,7 @@ class UniversityRecommender:
             List of university recommendations with scores
         """
         # Try the improved vector-based approach first
-        if self.student_profile_index is not None and len(self.student_vectors) > 0:
+        if self.student_profile_matrix is not None and len(self.student_ids) > 0:
             return self.recommend_universities_vector_based(aspiring_profile, top_n)
         else:
             logger.warning("Vector similarity not available, using standard recommendation approach")
@@ -859,7 +868,7 @@ class UniversityRecommender:
     def compute_student_similarity(self, aspiring_profile, existing_student):
         """Compute overall similarity between aspiring student and existing student"""
         # Find university data for this student
-        university = next((u for u in self.universities if u.get('id') == existing_student.get('university_id')), {})
+        university = self._universities_by_id.get(existing_student.get('university_id'), {})
 
         # Compute category similarities
         academic_sim = self.compute_academic_similarity(aspiring_profile, existing_student)
@@ -971,17 +980,16 @@ class UniversityRecommender:
         university_scores = []
 
         for uni_id, uni_metadata in candidate_universities:
-            university = next((u for u in self.universities if u.get('id') == uni_id), None)
+            university = self._universities_by_id.get(uni_id)
             if not university:
                 continue
 
             # Find the students from this university
-            uni_students = [s for s in self.existing_students if s.get('university_id') == uni_id]
+            uni_students = self._students_by_university.get(uni_id, [])
 
             # If too many students, sample them (for memory efficiency)
             sample_size = min(20, len(uni_students))  # Reduced from 50
             if len(uni_students) > sample_size:
-                import random
                 uni_students = random.sample(uni_students, sample_size)
 
             # TIER 3: DETAILED STUDENT SIMILARITY
@@ -995,58 +1003,36 @@ class UniversityRecommender:
             if not student_similarities:
                 continue
 
-            # Sort by similarity and take top matches
-            student_similarities.sort(key=lambda x: x['overall_similarity'], reverse=True)
-            top_students = student_similarities[:3]  # Reduced from top 5
-
-            # Calculate average scores
-            avg_overall = sum(s['overall_similarity'] for s in top_students) / len(top_students)
-            avg_academic = sum(s['academic_similarity'] for s in top_students) / len(top_students)
-            avg_social = sum(s['social_similarity'] for s in top_students) / len(top_students)
-            avg_financial = sum(s['financial_similarity'] for s in top_students) / len(top_students)
-            avg_career = sum(s['career_similarity'] for s in top_students) / len(top_students)
-            avg_geographic = sum(s['geographic_similarity'] for s in top_students) / len(top_students)
-            avg_facilities = sum(s['facilities_similarity'] for s in top_students) / len(top_students)
-            avg_reputation = sum(s['reputation_similarity'] for s in top_students) / len(top_students)
-            avg_personal = sum(s['personal_fit_similarity'] for s in top_students) / len(top_students)
-
-            # Add to university scores
+            # Take top matches by similarity
+            top_students = heapq.nlargest(3, student_similarities,
+                                          key=itemgetter('overall_similarity'))  # Reduced from top 5
+
+            # Add to university scores with averages computed from the top matches
             university_scores.append({
                 'university_id': uni_id,
                 'university_name': university.get('name', 'Unknown University'),
                 'location': university.get('location', ''),
                 'size': university.get('size', ''),
                 'setting': university.get('setting', ''),
-                'overall_score': avg_overall,
-                'academic_score': avg_academic,
-                'social_score': avg_social,
-                'financial_score': avg_financial,
-                'career_score': avg_career,
-                'geographic_score': avg_geographic,
-                'facilities_score': avg_facilities,
-                'reputation_score': avg_reputation,
-                'personal_fit_score': avg_personal,
+                **self._average_similarity_scores(top_students),
                 'matching_student_count': len(top_students),
                 'similar_students': top_students
             })
 
-        # Sort by overall score
-        university_scores.sort(key=lambda x: x['overall_score'], reverse=True)
-
-        # Return top_n universities
-        return university_scores[:top_n]
+        # Return top_n universities by overall score
+        return heapq.nlargest(top_n, university_scores, key=itemgetter('overall_score'))
 
     def find_similar_students(self, aspiring_profile, top_n=5):
         """Find existing students most similar to the aspiring student"""
         # Try vector similarity approach first
-        if self.student_profile_index is not None and len(self.student_vectors) > 0:
+        if self.student_profile_matrix is not None and len(self.student_ids) > 0:
             vector_similar_ids = self.find_similar_students_vector(aspiring_profile, top_k=top_n * 2)
 
             if vector_similar_ids:
                 similar_students = []
 
                 for student_id, vector_sim in vector_similar_ids:
-                    student = next((s for s in self.existing_students if s.get('id') == student_id), None)
+                    student = self._students_by_id.get(student_id)
                     if student:
                         similarity_data = self.compute_student_similarity(aspiring_profile, student)
                         # Boost similarity score with vector similarity
@@ -1054,9 +1040,8 @@ class UniversityRecommender:
                             'overall_similarity'] + 0.3 * vector_sim
                         similar_students.append(similarity_data)
 
-                # Sort by overall similarity
-                similar_students.sort(key=lambda x: x['overall_similarity'], reverse=True)
-                return similar_students[:top_n]
+                # Return the top_n by overall similarity
+                return heapq.nlargest(top_n, similar_students, key=itemgetter('overall_similarity'))
 
         # Fallback to original method
         similarities = []
@@ -1067,7 +1052,5 @@ class UniversityRecommender:
             similarity_data = self.compute_student_similarity(aspiring_profile, existing_student)
             similarities.append(similarity_data)
 
-        # Sort by overall similarity
-        similarities.sort(key=lambda x: x['overall_similarity'], reverse=True)
-
-        return similarities[:top_n]
+        # Return the top_n by overall similarity
+        return heapq.nlargest(top_n, similarities, key=itemgetter('overall_similarity'))
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from typing import List, Dict, Any, Optional
 
@@ -6,6 +7,15 @@ from .supabase_client import SupabaseDB
 
 logger = logging.getLogger(__name__)
 
+# Bookkeeping columns dropped when flattening profile sections
+EXCLUDED_SECTION_KEYS = frozenset({"id", "student_id", "created_at"})
+
+EXISTING_STUDENT_SECTIONS = ("university_info", "academic", "social", "career",
+                             "financial", "facilities", "reputation", "personal_fit",
+                             "selection_criteria", "additional_insights")
+ASPIRING_STUDENT_SECTIONS = ("core", "academic", "social", "career", "financial",
+                             "geographic", "facilities", "reputation", "personal_fit")
+
 
 class UniversityRecommendationService:
     """
@@ -56,12 +66,10 @@ class UniversityRecommendationService:
                 flat_data[key] = value
 
         # Copy data from each section
-        for section in ["university_info", "academic", "social", "career",
-                        "financial", "facilities", "reputation", "personal_fit",
-                        "selection_criteria", "additional_insights"]:
+        for section in EXISTING_STUDENT_SECTIONS:
             if section in student_data and student_data[section]:
                 for key, value in student_data[section].items():
-                    if key not in ["id", "student_id", "created_at"]:
+                    if key not in EXCLUDED_SECTION_KEYS:
                         flat_data[key] = value
 
         return flat_data
@@ -79,11 +87,10 @@ class UniversityRecommendationService:
         flat_data = {}
 
         # Copy data from each section
-        for section in ["core", "academic", "social", "career", "financial",
-                        "geographic", "facilities", "reputation", "personal_fit"]:
+        for section in ASPIRING_STUDENT_SECTIONS:
             if section in student_data and student_data[section]:
                 for key, value in student_data[section].items():
-                    if key not in ["id", "student_id", "created_at"]:
+                    if key not in EXCLUDED_SECTION_KEYS:
                         flat_data[key] = value
 
         return flat_data
@@ -122,14 +129,17 @@ class UniversityRecommendationService:
         # Limit to the first N students
         student_ids = student_ids[:student_sample_size]
 
-        # Load student data in smaller batches
+        # Load student data in smaller batches, fetching the batches concurrently on
+        # worker threads instead of waiting for each one in turn
         batch_size = 50  # Smaller batch size
         existing_students = []
 
-        for i in range(0, len(student_ids), batch_size):
-            batch_ids = student_ids[i:i + batch_size]
-            student_batch = self.db.get_complete_existing_students_batch(batch_ids)
+        student_batches = await asyncio.gather(*(
+            asyncio.to_thread(self.db.get_complete_existing_students_batch, student_ids[i:i + batch_size])
+            for i in range(0, len(student_ids), batch_size)
+        ))
 
+        for student_batch in student_batches:
             # Convert to flat format
             for student_id, student_data in student_batch.items():
                 if "core" in student_data:
@@ -285,37 +295,12 @@ class UniversityRecommendationService:
         if not user:
             raise ValueError(f"User {username} not found")
 
-        user_id = user["id"]
-
         # Get the aspiring student
-        aspiring_student_response = self.db.supabase.table("aspiring_students").select("*").eq("user_id",
-                                                                                               user_id).limit(
-            1).execute()
-        if not aspiring_student_response.data:
-            raise ValueError(f"Aspiring student for user {username} not found")
-
-        aspiring_student_id = aspiring_student_response.data[0]["id"]
-
-        # Now fetch all sections in two batches
-        profile_data = {"core": aspiring_student_response.data[0]}
-
-        # Batch 1: Core preference sections
-        sections1 = ["academic", "social", "career", "financial"]
-        for section in sections1:
-            table = f"aspiring_students_{section}"
-            response = self.db.supabase.table(table).select("*").eq("student_id", aspiring_student_id).limit(
-                1).execute()
-            if response.data:
-                profile_data[section] = response.data[0]
-
-        # Batch 2: Additional preference sections
-        sections2 = ["geographic", "facilities", "reputation", "personal_fit"]
-        for section in sections2:
-            table = f"aspiring_students_{section}"
-            response = self.db.supabase.table(table).select("*").eq("student_id", aspiring_student_id).limit(
-                1).execute()
-            if response.data:
-                profile_data[section] = response.data[0]
+        aspiring_student = await self.db.get_aspiring_student_by_user_id(user["id"])
+        aspiring_student_id = aspiring_student[0]["id"]
+
+        # Fetch all sections (fetched concurrently by the client) off the event loop
+        profile_data = await asyncio.to_thread(self.db.get_aspiring_student_complete, aspiring_student_id)
 
         # Convert to flat structure
         flat_profile = self._flatten_aspiring_student(profile_data)
@@ -358,14 +343,13 @@ class UniversityRecommendationService:
         if not user:
             raise ValueError(f"User with username {username} not found")
 
-        aspiring_student = await self.db.get_aspiring_student(username)
-        if not aspiring_student or not aspiring_student[0]:
-            raise ValueError(f"Aspiring student with username {username} not found")
-
+        # Look up the aspiring student from the user already fetched, rather than
+        # re-fetching the user by username inside get_aspiring_student
+        aspiring_student = await self.db.get_aspiring_student_by_user_id(user["id"])
         aspiring_student_id = aspiring_student[0]["id"]
 
-        # Get the profile with a single query
-        profile_data = self.db.get_aspiring_student_complete(aspiring_student_id)
+        # Fetch all sections (fetched concurrently by the client) off the event loop
+        profile_data = await asyncio.to_thread(self.db.get_aspiring_student_complete, aspiring_student_id)
         if not profile_data:
             raise ValueError(f"Aspiring student with ID {aspiring_student_id} not found")
 
@@ -1,9 +1,18 @@
-from typing import List, Dict, Any, Optional
+import concurrent.futures
+import logging
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Callable
 
+from postgrest.types import ReturnMethod
 from supabase import create_client, Client
 
 from config import SUPABASE_URL, SUPABASE_KEY
 
+logger = logging.getLogger(__name__)
+
+# Upper bound on Supabase requests in flight at once from a single client
+MAX_CONCURRENT_REQUESTS = 10
+
 
 class SupabaseDB:
     """
@@ -21,9 +30,14 @@ class SupabaseDB:
         """
         self.supabase: Client = create_client(url, key)
 
+        # Shared, bounded pool for overlapping independent requests (see _run_concurrently)
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS,
+                                                               thread_name_prefix="supabase")
+
         # Limited cache size to reduce memory usage
         self._max_cache_size = 25  # Small cache size
-        self._university_cache = {}
+        # Least-recently-used university cache (most recent entries at the end)
+        self._university_cache = OrderedDict()
 
         # No program cache - fetch directly when needed
 
@@ -43,10 +57,25 @@ class SupabaseDB:
     def _manage_cache_size(self, cache_dict):
         """Helper method to ensure cache doesn't exceed maximum size"""
         if len(cache_dict) >= self._max_cache_size:
-            # Simple eviction strategy: remove oldest item (first key)
+            # LRU eviction: remove the least recently used item (first key)
             if cache_dict:
-                oldest_key = next(iter(cache_dict))
-                cache_dict.pop(oldest_key)
+                cache_dict.popitem(last=False)
+
+    def _run_concurrently(self, tasks: Dict[str, Callable[[], Any]]) -> Dict[str, Any]:
+        """
+        Run independent Supabase requests on the shared thread pool so their round-trips overlap.
+
+        Args:
+            tasks: Dictionary mapping a result key to a zero-argument callable
+
+        Returns:
+            Dictionary mapping each key to the value returned by its callable
+        """
+        if not tasks:
+            return {}
+
+        futures = {key: self._executor.submit(task) for key, task in tasks.items()}
+        return {key: future.result() for key, future in futures.items()}
 
     # ===== Account Operations =====
     async def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
@@ -181,6 +210,7 @@ class SupabaseDB:
         """
         # Check cache first
         if university_id in self._university_cache:
+            self._university_cache.move_to_end(university_id)
             return self._university_cache[university_id]
 
         # If not in cache, fetch from database
@@ -226,6 +256,7 @@ class SupabaseDB:
         # Add cached universities to results
         for uid in university_ids:
             if uid in self._university_cache and uid not in results:
+                self._university_cache.move_to_end(uid)
                 results[uid] = self._university_cache[uid]
 
         return results
@@ -427,32 +458,27 @@ class SupabaseDB:
         # Create a dictionary to store results by student ID
         students_data = {student_id: {} for student_id in student_ids}
 
-        # Fetch core student data
-        core_response = self.supabase.table("existing_students").select("*").in_("id", student_ids).execute()
+        sections = ["university_info", "academic", "social", "career", "financial", "facilities",
+                    "reputation", "personal_fit", "selection_criteria", "additional_insights"]
+
+        # Fetch core student data and every section concurrently, since none depend on each other
+        queries = {"core": self.supabase.table("existing_students").select("*").in_("id", student_ids).execute}
+        for section in sections:
+            table_name = f"existing_students_{section}"
+            queries[section] = self.supabase.table(table_name).select("*").in_("student_id", student_ids).execute
+        responses = self._run_concurrently(queries)
 
         # Initialize with core data
-        for student in core_response.data:
+        for student in responses["core"].data:
             student_id = student["id"]
             students_data[student_id]["core"] = student
 
-        # Batch sections to reduce query count
-        section_batches = [
-            ["university_info", "academic", "social"],  # Batch 1
-            ["career", "financial", "facilities"],  # Batch 2
-            ["reputation", "personal_fit", "selection_criteria", "additional_insights"]  # Batch 3
-        ]
-
-        # Process each batch
-        for batch in section_batches:
-            for section in batch:
-                table_name = f"existing_students_{section}"
-                section_response = self.supabase.table(table_name).select("*").in_("student_id", student_ids).execute()
-
-                # Map section data to the appropriate student
-                for record in section_response.data:
-                    student_id = record["student_id"]
-                    if student_id in students_data:
-                        students_data[student_id][section] = record
+        # Map section data to the appropriate student
+        for section in sections:
+            for record in responses[section].data:
+                student_id = record["student_id"]
+                if student_id in students_data:
+                    students_data[student_id][section] = record
 
         return students_data
 
@@ -479,23 +505,23 @@ class SupabaseDB:
             "aspiring_students_personal_fit"
         ]
 
-        # Initialize result
-        result = {}
-
-        # Fetch each section with a single efficient query
+        # Queue one query per section, keyed by section type
+        queries = {}
         for section in sections:
             # For the core table, use 'id' as the key
             id_field = "id" if section == "aspiring_students" else "student_id"
+            section_type = section.replace("aspiring_students_", "") if section != "aspiring_students" else "core"
 
-            response = self.supabase.table(section) \
+            queries[section_type] = self.supabase.table(section) \
                 .select("*") \
                 .eq(id_field, student_id) \
                 .limit(1) \
-                .execute()
+                .execute
 
+        # Fetch all sections at once instead of one round-trip after another
+        result = {}
+        for section_type, response in self._run_concurrently(queries).items():
             if response.data:
-                # Store section type in the result
-                section_type = section.replace("aspiring_students_", "") if section != "aspiring_students" else "core"
                 result[section_type] = response.data[0]
 
         return result
@@ -511,8 +537,18 @@ class SupabaseDB:
             Aspiring student record
         """
         user = await self.get_user_by_username(username)
-        user_id = user["id"]
+        return await self.get_aspiring_student_by_user_id(user["id"])
 
+    async def get_aspiring_student_by_user_id(self, user_id: int) -> Dict[str, Any]:
+        """
+        Get aspiring student by the ID of its user account.
+
+        Args:
+            user_id: ID of the user
+
+        Returns:
+            Aspiring student record
+        """
         response = self.supabase.table("aspiring_students").select("*").eq("user_id", user_id).limit(1).execute()
         data = response.data
 
@@ -542,16 +578,20 @@ class SupabaseDB:
         aspiring_student_id = aspiring_student[0]["id"]
 
         # Add student_id to all section data
+        inserts = {}
         for section in ["academic", "social", "career", "financial",
                         "geographic", "facilities", "reputation", "personal_fit"]:
             if section in student_data:
                 section_data = student_data[section]
                 section_data["student_id"] = aspiring_student_id
 
-                # Insert section data
+                # Queue the section insert; sections are independent tables
                 table_name = f"aspiring_students_{section}"
-                section_response = self.supabase.table(table_name).insert(section_data).execute()
-                results[section] = section_response.data[0]
+                inserts[section] = self.supabase.table(table_name).insert(section_data).execute
+
+        # Send all section inserts at once instead of one round-trip after another
+        for section, section_response in self._run_concurrently(inserts).items():
+            results[section] = section_response.data[0]
 
         return results
 
@@ -622,12 +662,11 @@ class SupabaseDB:
                     "personal_fit_similarity": student.get("personal_fit_similarity", 0)
                 })
 
-        # Process similar students in smaller batches if there are many
+        # Insert all similar students in a single batch (at most 10 x 3 rows)
         if all_similar_students:
-            batch_size = 20  # Smaller batch size
-            for i in range(0, len(all_similar_students), batch_size):
-                batch = all_similar_students[i:i + batch_size]
-                self.supabase.table("similar_students").insert(batch).execute()
+            # Inserted rows are never read back, so skip returning them
+            self.supabase.table("similar_students").insert(
+                all_similar_students, returning=ReturnMethod.minimal).execute()
 
         return saved_recs
 
@@ -849,7 +888,7 @@ class SupabaseDB:
 
             return None
         except Exception as e:
-            print(f"Error retrieving recommendation justification: {e}")
+            logger.error(f"Error retrieving recommendation justification: {e}")
             return None
 
     def save_recommendation_justification(self, recommendation_id: int, justification_data: Dict[str, Any]) -> Dict[
@@ -899,7 +938,7 @@ class SupabaseDB:
 
             return response.data[0] if response.data else None
         except Exception as e:
-            print(f"Error saving recommendation justification: {e}")
+            logger.error(f"Error saving recommendation justification: {e}")
             return None
 
     # Additional methods for the SupabaseDB class
@@ -1085,7 +1124,7 @@ class SupabaseDB:
 
         # Process each batch
         for batch in section_batches:
-            batch_data = {}
+            inserts = {}
 
             # Prepare data for this batch
             for section in batch:
@@ -1093,10 +1132,13 @@ class SupabaseDB:
                     section_data = student_data[section].copy()  # Create a copy to avoid modifying original
                     section_data["student_id"] = student_id
 
-                    # Insert section data
+                    # Queue the section insert
                     table_name = f"existing_students_{section}"
-                    section_response = self.supabase.table(table_name).insert(section_data).execute()
-                    results[section] = section_response.data[0]
+                    inserts[section] = self.supabase.table(table_name).insert(section_data).execute
+
+            # Insert the batch's sections concurrently
+            for section, section_response in self._run_concurrently(inserts).items():
+                results[section] = section_response.data[0]
 
         return results
 
@@ -19,6 +19,7 @@ class HeartbeatService:
         """Initialize the heartbeat service with minimal state."""
         self.is_running = False
         self.task = None
+        self.session = None
 
         # Get configuration from environment variables
         self.interval = HEARTBEAT_INTERVAL  # Default: 10 minutes
@@ -38,6 +39,8 @@ class HeartbeatService:
             return
 
         self.is_running = True
+        # Reuse one session (and its keep-alive connection) across pings
+        self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5))
         self.task = asyncio.create_task(self._heartbeat_loop())
         logger.info(f"Heartbeat service started with interval of {self.interval} seconds")
 
@@ -54,6 +57,9 @@ class HeartbeatService:
             except asyncio.CancelledError:
                 pass
             self.task = None
+        if self.session:
+            await self.session.close()
+            self.session = None
         logger.info("Heartbeat service stopped")
 
     def get_stats(self):
@@ -77,15 +83,14 @@ class HeartbeatService:
         url = self._get_app_url()
 
         try:
-            # Use a new session for each request to prevent session state accumulation
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, timeout=5) as response:
-                    if response.status == 200:
-                        if self.stats_enabled:
-                            self.ping_count += 1
-                        # Avoid any additional processing here
-                    else:
-                        logger.warning(f"Heartbeat returned status: {response.status}")
+            # Reuse the pooled session to skip a new TCP/TLS handshake on every ping
+            async with self.session.get(url) as response:
+                if response.status == 200:
+                    if self.stats_enabled:
+                        self.ping_count += 1
+                    # Avoid any additional processing here
+                else:
+                    logger.warning(f"Heartbeat returned status: {response.status}")
 
         except Exception as e:
             logger.error(f"Heartbeat failed: {str(e)}")